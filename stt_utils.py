@@ -5,10 +5,83 @@ This module provides reusable speech-to-text functionality using faster-whisper.
 Extracted from the YouTube transcriber project for reuse in other applications.
 """
 
+import multiprocessing
 import os
+import platform
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import replace
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Tuple, Dict, Any, Callable, Generator
+from typing import Optional, Tuple, Dict, Any, Callable, Generator, BinaryIO, Union, List
+
+# Physical cores, assuming two hyperthreads per core. CTranslate2's int8 GEMM
+# (AVX512-VNNI in particular) saturates a core's vector units, so a second
+# thread on the HT sibling only adds contention. The OpenMP/MKL defaults
+# must be set before numpy or CTranslate2 start their thread pools.
+_PHYSICAL_CORES = max(1, (os.cpu_count() or 2) // 2)
+os.environ.setdefault("OMP_NUM_THREADS", str(_PHYSICAL_CORES))
+os.environ.setdefault("MKL_NUM_THREADS", str(_PHYSICAL_CORES))
+
+import numpy as np
+
+
+# Loaded WhisperModel / BatchedInferencePipeline instances keyed by
+# (model_name, device, compute_type)
+_MODEL_CACHE: Dict[tuple, Any] = {}
+_PIPELINE_CACHE: Dict[tuple, Any] = {}
+_CACHE_LOCK = threading.Lock()
+# One lock per cache key, so a slow load (or hub download) of one model never
+# blocks lookups or loads of another
+_LOAD_LOCKS: Dict[tuple, threading.Lock] = {}
+
+# Number of transcriptions a model can run in parallel; 1 favours single-stream
+# latency, raise it (e.g. to 2) for throughput under concurrent load. The
+# physical cores are divided between the workers either way.
+NUM_WORKERS = int(os.getenv("WHISPER_NUM_WORKERS", "1"))
+
+# Whisper models consume 16 kHz mono audio
+SAMPLE_RATE = 16000
+
+# Characters dropped from titles by create_safe_filename: anything that is not
+# alphanumeric (any script), space, hyphen or underscore
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^\w \-]")
+
+# Line format for timestamped transcripts: "[start - end] text"
+_TIMESTAMPED_LINE = "[%s - %s] %s\n"
+
+# Number of 30-second windows encoded together by the batched pipeline
+BATCH_SIZE = 16
+
+# Audio longer than this many seconds is decoded in parallel windows of at most
+# _WINDOW_SECONDS, with _OVERLAP_SECONDS shared where speech has to be cut
+PARALLEL_MIN_DURATION = 600
+_WINDOW_SECONDS = 300
+_OVERLAP_SECONDS = 2
+
+# One long-lived pool of spawned decoder processes shared by every
+# transcribe_audio_parallel call, so concurrent long jobs queue for the same
+# workers instead of each starting their own. Together the workers use the
+# physical-core budget once.
+PARALLEL_WORKERS = int(os.getenv("WHISPER_PARALLEL_WORKERS", str(max(1, _PHYSICAL_CORES // 2))))
+_PARALLEL_POOL = None
+_PARALLEL_POOL_LOCK = threading.Lock()
+
+# Per-process state of the pool workers: CTranslate2 threads per worker and
+# the models loaded so far, keyed like _MODEL_CACHE
+_worker_cpu_threads = 1
+_worker_models: Dict[tuple, Any] = {}
+
+# One YoutubeDL per thread: instances keep extractor and network state between
+# downloads but are not safe to share across threads
+_ydl_local = threading.local()
 
 
 class TranscriptionResult:
@@ -24,29 +97,140 @@ class TranscriptionResult:
         self.language_probability = info.language_probability
 
 
+@lru_cache(maxsize=None)
+def _best_compute_type(device: str) -> str:
+    """Pick the quantization scheme that the kernels on this device actually support"""
+    # int8 on GPU often runs slower than float16: not every op has an int8
+    # kernel and the dequantization overhead outweighs the bandwidth savings.
+    if device == "cuda":
+        return "float16"
+    
+    # Only x86 reports the flags we key on; ARM (Features), macOS and Windows
+    # keep the previous int8 default rather than falling back to float32
+    if platform.machine().lower() not in ("x86_64", "amd64", "i386", "i686"):
+        return "int8"
+    
+    flags = set()
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    flags.update(line.split(":", 1)[1].split())
+                    break
+    except OSError:
+        pass
+    if not flags:
+        return "int8"
+    
+    # Dynamic int8 quantization gives roughly a third off Whisper CPU latency,
+    # but only when VNNI int8 dot-product instructions are available.
+    if "avx512_vnni" in flags:
+        return "int8"
+    if "avx2" in flags:
+        return "int8_float32"
+    return "float32"
+
+
 def format_timestamp(seconds: float) -> str:
     """Format seconds to MM:SS or HH:MM:SS"""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    seconds = int(seconds % 60)
+    hours, remainder = divmod(int(seconds), 3600)
+    minutes, seconds = divmod(remainder, 60)
     
-    if hours > 0:
-        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-    else:
-        return f"{minutes:02d}:{seconds:02d}"
+    if hours:
+        return "%02d:%02d:%02d" % (hours, minutes, seconds)
+    return "%02d:%02d" % (minutes, seconds)
+
+
+def _ffmpeg_decode(input_arg: str, source: Optional[BinaryIO] = None) -> np.ndarray:
+    """Run ffmpeg on input_arg (a path, or pipe:0 fed from source) and return the samples"""
+    cmd = ["ffmpeg", "-loglevel", "error", "-i", input_arg,
+           "-ar", str(SAMPLE_RATE), "-ac", "1", "-f", "s16le", "pipe:1"]
+    with tempfile.TemporaryFile() as stderr:
+        try:
+            proc = subprocess.Popen(cmd, stdin=subprocess.PIPE if source else subprocess.DEVNULL,
+                                    stdout=subprocess.PIPE, stderr=stderr)
+        except FileNotFoundError as e:
+            raise Exception(f"ffmpeg is required to decode audio: {e}")
+        
+        # Feed stdin from a separate thread so ffmpeg's stdout never fills up
+        def feed():
+            try:
+                shutil.copyfileobj(source, proc.stdin, 1 << 20)
+            except (BrokenPipeError, ValueError):
+                pass
+            finally:
+                try:
+                    proc.stdin.close()
+                except OSError:
+                    pass
+        
+        feeder = None
+        if source:
+            feeder = threading.Thread(target=feed, daemon=True)
+            feeder.start()
+        pcm = proc.stdout.read()
+        proc.stdout.close()
+        if feeder:
+            feeder.join()
+        
+        if proc.wait() != 0:
+            stderr.seek(0)
+            raise Exception(f"ffmpeg failed to decode audio: {stderr.read().decode(errors='replace').strip()}")
+    
+    return np.frombuffer(pcm, np.int16).astype(np.float32) / 32768.0
+
+
+def decode_audio_stream(source: BinaryIO) -> np.ndarray:
+    """
+    Decode an audio byte stream to 16 kHz mono float32 samples with ffmpeg
+    
+    The stream is piped through a single ffmpeg process as it is read, so no
+    intermediate file is written.
+    
+    Args:
+        source: Readable binary file-like object in any format ffmpeg understands
+        
+    Returns:
+        1-D float32 array of samples in [-1, 1] at SAMPLE_RATE
+        
+    Raises:
+        Exception: If ffmpeg is missing or fails to decode the stream
+    """
+    return _ffmpeg_decode("pipe:0", source)
+
 
+def decode_audio_file(path: Union[Path, str]) -> np.ndarray:
+    """
+    Decode an audio file to 16 kHz mono float32 samples with ffmpeg
+    
+    Unlike decode_audio_stream, ffmpeg can seek in the file, which containers
+    such as MP4/M4A with a trailing index require.
+    
+    Args:
+        path: Path to a file in any format ffmpeg understands
+        
+    Returns:
+        1-D float32 array of samples in [-1, 1] at SAMPLE_RATE
+        
+    Raises:
+        Exception: If ffmpeg is missing or fails to decode the file
+    """
+    return _ffmpeg_decode(str(path))
 
-def download_youtube_audio(url: str, output_dir: Path, temp_filename: str = "temp_audio") -> Tuple[Path, Dict[str, Any]]:
+
+def download_youtube_audio(url: str) -> Tuple[np.ndarray, Dict[str, Any]]:
     """
     Download audio from YouTube URL
     
+    yt-dlp's own downloader fetches the best audio stream as-is (chunked
+    HTTP, HLS or DASH) into a temporary directory, and ffmpeg decodes it
+    straight to samples; there is no MP3 re-encode step.
+    
     Args:
         url: YouTube URL
-        output_dir: Directory to save the audio file
-        temp_filename: Base filename for temporary audio file
         
     Returns:
-        Tuple of (audio_file_path, video_info)
+        Tuple of (audio_samples, video_info), samples as returned by decode_audio_file
         
     Raises:
         ImportError: If yt-dlp is not available
@@ -57,91 +241,349 @@ def download_youtube_audio(url: str, output_dir: Path, temp_filename: str = "tem
     except ImportError as e:
         raise ImportError(f"Missing required package. Please install: pip install yt-dlp\nError: {e}")
     
-    # Ensure output directory exists
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Configure yt-dlp
-    audio_path = output_dir / f"{temp_filename}.%(ext)s"
-    ydl_opts = {
-        'format': 'bestaudio/best',
-        'outtmpl': str(audio_path),
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-            'preferredquality': '192',
-        }],
-        'quiet': True,
-    }
+    # Configure yt-dlp once per thread; no postprocessors, the raw stream is kept
+    ydl = getattr(_ydl_local, 'ydl', None)
+    if ydl is None:
+        ydl_opts = {
+            'format': 'bestaudio/best',
+            'outtmpl': '%(id)s.%(ext)s',
+            'quiet': True,
+        }
+        ydl = _ydl_local.ydl = yt_dlp.YoutubeDL(ydl_opts)
     
     # Download audio
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            ydl.params['paths'] = {'home': temp_dir}
             info = ydl.extract_info(url, download=True)
+            audio = decode_audio_file(info['requested_downloads'][0]['filepath'])
             
-        # Find the downloaded audio file
-        audio_file = output_dir / f"{temp_filename}.mp3"
-        if not audio_file.exists():
-            raise FileNotFoundError("Audio file not found after download")
-            
-        return audio_file, info
+        return audio, info
         
     except Exception as e:
         raise Exception(f"Failed to download video: {e}")
 
 
-def transcribe_audio_file(audio_file_path: Path, model_name: str = "base", 
-                         device: str = "cpu", compute_type: str = "int8",
-                         beam_size: int = 5) -> Tuple[Generator, Any]:
+def _model_key(model_name: str, device: str, compute_type: Optional[str]) -> tuple:
+    """Build the cache key, resolving a None compute_type for the device"""
+    if compute_type is None:
+        compute_type = _best_compute_type(device)
+    return (model_name, device, compute_type)
+
+
+def get_model(model_name: str = "base", device: str = "cpu", compute_type: Optional[str] = None):
     """
-    Transcribe an audio file using faster-whisper
+    Return a cached faster-whisper model, loading it on first use
     
     Args:
-        audio_file_path: Path to the audio file
         model_name: Whisper model to use (tiny, base, small, medium, large)
         device: Device to use for inference (cpu, cuda)
-        compute_type: Computation type (int8, int16, float16, float32)
-        beam_size: Beam size for decoding
+        compute_type: Computation type (int8, int16, float16, float32);
+            None picks the best type for the device
         
     Returns:
-        Tuple of (segments_generator, transcription_info)
+        WhisperModel instance shared by all callers with the same configuration
         
     Raises:
         ImportError: If faster-whisper is not available
-        Exception: If transcription fails
+        Exception: If the model fails to load
     """
     try:
         from faster_whisper import WhisperModel
     except ImportError as e:
         raise ImportError(f"Missing required package. Please install: pip install faster-whisper\nError: {e}")
     
-    # Load faster-whisper model
+    key = _model_key(model_name, device, compute_type)
+    model = _MODEL_CACHE.get(key)
+    if model is not None:
+        return model
+    
+    with _CACHE_LOCK:
+        load_lock = _LOAD_LOCKS.setdefault(key, threading.Lock())
+    with load_lock:
+        model = _MODEL_CACHE.get(key)
+        if model is None:
+            try:
+                # cpu_threads is per worker, so the workers split the cores
+                model = WhisperModel(model_name, device=device, compute_type=key[2],
+                                     cpu_threads=max(1, _PHYSICAL_CORES // NUM_WORKERS),
+                                     num_workers=NUM_WORKERS)
+            except Exception as e:
+                raise Exception(f"Failed to load faster-whisper model: {e}")
+            _MODEL_CACHE[key] = model
+    return model
+
+
+def get_batched_pipeline(model_name: str = "base", device: str = "cpu",
+                         compute_type: Optional[str] = None):
+    """
+    Return a cached BatchedInferencePipeline wrapping the cached model
+    
+    Args:
+        model_name: Whisper model to use (tiny, base, small, medium, large)
+        device: Device to use for inference (cpu, cuda)
+        compute_type: Computation type; None picks the best type for the device
+        
+    Returns:
+        BatchedInferencePipeline instance sharing the model returned by get_model
+        
+    Raises:
+        ImportError: If faster-whisper is not available
+        Exception: If the model fails to load
+    """
     try:
-        model = WhisperModel(model_name, device=device, compute_type=compute_type)
-    except Exception as e:
-        raise Exception(f"Failed to load faster-whisper model: {e}")
+        from faster_whisper import BatchedInferencePipeline
+    except ImportError as e:
+        raise ImportError(f"Missing required package. Please install: pip install faster-whisper>=1.1.0\nError: {e}")
+    
+    model = get_model(model_name, device, compute_type)
+    key = _model_key(model_name, device, compute_type)
+    with _CACHE_LOCK:
+        pipeline = _PIPELINE_CACHE.get(key)
+        if pipeline is None:
+            pipeline = BatchedInferencePipeline(model=model)
+            _PIPELINE_CACHE[key] = pipeline
+    return pipeline
+
+
+def transcribe_audio_file(audio: Union[Path, np.ndarray], model_name: str = "base", 
+                         device: str = "cpu", compute_type: Optional[str] = None,
+                         beam_size: int = 1, vad_filter: bool = True,
+                         vad_parameters: Optional[Dict[str, Any]] = None,
+                         batched: bool = True) -> Tuple[Generator, Any]:
+    """
+    Transcribe an audio file or decoded samples using faster-whisper
+    
+    Args:
+        audio: Path to the audio file, or 16 kHz mono float32 samples
+        model_name: Whisper model to use (tiny, base, small, medium, large)
+        device: Device to use for inference (cpu, cuda)
+        compute_type: Computation type (int8, int16, float16, float32);
+            None picks the best type for the device
+        beam_size: Beam size for decoding; 1 is greedy search, which is several
+            times cheaper to decode than beam_size=5 at a small accuracy cost
+        vad_filter: Whether to drop non-speech audio with Silero VAD before decoding
+        vad_parameters: VAD options (defaults to min_silence_duration_ms=500)
+        batched: Encode VAD-split 30-second chunks as a batch with
+            BatchedInferencePipeline; requires vad_filter, otherwise the
+            sequential path is used
+        
+    Returns:
+        Tuple of (segments_generator, transcription_info)
+        
+    Raises:
+        ImportError: If faster-whisper is not available
+        Exception: If transcription fails
+    """
+    # Load (or reuse) the faster-whisper model. The batched pipeline chunks the
+    # audio on VAD boundaries, so it is only usable with vad_filter enabled.
+    if batched and vad_filter:
+        transcriber = get_batched_pipeline(model_name, device, compute_type)
+        options = {"batch_size": BATCH_SIZE}
+    else:
+        transcriber = get_model(model_name, device, compute_type)
+        options = {}
     
     # Transcribe
     try:
-        segments, info = model.transcribe(str(audio_file_path), beam_size=beam_size)
+        if vad_parameters is None:
+            vad_parameters = dict(min_silence_duration_ms=500)
+        if not isinstance(audio, np.ndarray):
+            audio = str(audio)
+        segments, info = transcriber.transcribe(audio, beam_size=beam_size,
+                                                best_of=1, vad_filter=vad_filter,
+                                                vad_parameters=vad_parameters, **options)
         return segments, info
     except Exception as e:
         raise Exception(f"Transcription failed: {e}")
 
 
+def _init_worker(cpu_threads: int) -> None:
+    """Pool initializer: record this worker's share of the physical cores"""
+    global _worker_cpu_threads
+    _worker_cpu_threads = cpu_threads
+
+
+def _restore_time(seconds: float, chunks: List[Tuple[int, int]], offsets: List[int]) -> float:
+    """Map a time in concatenated speech back to the original audio, in seconds"""
+    position = seconds * SAMPLE_RATE
+    i = min(max(bisect_right(offsets, position) - 1, 0), len(chunks) - 1)
+    return (chunks[i][0] + position - offsets[i]) / SAMPLE_RATE
+
+
+def _decode_window(task: Tuple[tuple, str, List[Tuple[int, int]], np.ndarray]) -> Tuple[list, Any]:
+    """
+    Worker task: transcribe one window's concatenated speech in a fixed language
+    
+    The speech chunks (in samples of the original audio) come from the VAD
+    pass over the whole input, so VAD is not run again here; segment
+    timestamps are mapped back onto the original audio.
+    """
+    key, language, chunks, audio = task
+    model = _worker_models.get(key)
+    if model is None:
+        from faster_whisper import WhisperModel
+        model_name, device, compute_type = key
+        model = _worker_models[key] = WhisperModel(model_name, device=device, compute_type=compute_type,
+                                                   cpu_threads=_worker_cpu_threads)
+    offsets = [0]
+    for start, end in chunks:
+        offsets.append(offsets[-1] + end - start)
+    segments, info = model.transcribe(audio, language=language, beam_size=1, best_of=1, vad_filter=False)
+    return [replace(s, start=_restore_time(s.start, chunks, offsets), end=_restore_time(s.end, chunks, offsets))
+            for s in segments], info
+
+
+def _get_parallel_pool() -> ProcessPoolExecutor:
+    """Return the shared decoder pool, starting it on first use"""
+    global _PARALLEL_POOL
+    with _PARALLEL_POOL_LOCK:
+        if _PARALLEL_POOL is None:
+            _PARALLEL_POOL = ProcessPoolExecutor(
+                max_workers=PARALLEL_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker, initargs=(max(1, _PHYSICAL_CORES // PARALLEL_WORKERS),))
+        return _PARALLEL_POOL
+
+
+def _reset_parallel_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next call starts a fresh one"""
+    global _PARALLEL_POOL
+    with _PARALLEL_POOL_LOCK:
+        if _PARALLEL_POOL is pool:
+            _PARALLEL_POOL = None
+    pool.shutdown(wait=False)
+
+
+def _plan_windows(speech: List[Dict[str, int]], window: int, overlap: int) -> List[Tuple[int, int]]:
+    """Group VAD speech chunks (in samples) into windows of at most `window` samples"""
+    windows = []
+    for chunk in speech:
+        start, end = chunk["start"], chunk["end"]
+        if windows and end - windows[-1][0] <= window:
+            windows[-1] = (windows[-1][0], end)
+            continue
+        # Speech running past the window limit is cut, overlapping the next window
+        while end - start > window:
+            windows.append((start, start + window))
+            start += window - overlap
+        windows.append((start, end))
+    return windows
+
+
+def _word_overlap(a: str, b: str) -> float:
+    """Jaccard similarity of the lowercased word sets of two texts"""
+    words_a, words_b = set(a.lower().split()), set(b.lower().split())
+    if not words_a or not words_b:
+        return 0.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+def _stitch_windows(windows: List[Tuple[int, int]], results: List[list]) -> list:
+    """Concatenate per-window segments, dropping repeats decoded twice in an overlap"""
+    merged = []
+    prev_end = 0
+    for (start, end), segments in zip(windows, results):
+        if start < prev_end:
+            overlap_start, overlap_end = start / SAMPLE_RATE, prev_end / SAMPLE_RATE
+            tail = [s for s in merged[-8:] if s.end > overlap_start]
+            for segment in segments:
+                if segment.start < overlap_end and any(_word_overlap(segment.text, t.text) >= 0.5 for t in tail):
+                    continue
+                merged.append(segment)
+        else:
+            merged.extend(segments)
+        prev_end = end
+    return merged
+
+
+def transcribe_audio_parallel(audio: np.ndarray, model_name: str = "base",
+                              device: str = "cpu",
+                              compute_type: Optional[str] = None) -> Tuple[list, Any]:
+    """
+    Transcribe long audio by decoding windows of it in parallel processes
+    
+    Silero VAD runs once over the whole input; the speech is grouped into
+    windows of up to five minutes and only the speech of each window is
+    decoded. The language is detected once, on the first window, and every
+    window is then decoded in that language by the shared pool of
+    PARALLEL_WORKERS spawned processes, each holding its own model.
+    Windows only overlap (by two seconds) where continuous speech has to be
+    cut, and segments repeated in such an overlap are dropped when the
+    results are stitched together.
+    
+    Args:
+        audio: 16 kHz mono float32 samples
+        model_name: Whisper model to use (tiny, base, small, medium, large)
+        device: Device to use for inference (cpu, cuda)
+        compute_type: Computation type; None picks the best type for the device
+        
+    Returns:
+        Tuple of (segments_list, transcription_info); the info describes the
+        detected language and the duration of the whole input
+        
+    Raises:
+        ImportError: If faster-whisper is not available
+        Exception: If transcription fails
+    """
+    try:
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+    except ImportError as e:
+        raise ImportError(f"Missing required package. Please install: pip install faster-whisper\nError: {e}")
+    
+    # With a single worker there is nothing to parallelize; don't pay for a
+    # VAD pass that transcribe_audio_file would only repeat
+    if PARALLEL_WORKERS < 2:
+        return transcribe_audio_file(audio, model_name, device, compute_type)
+    
+    speech = get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=500))
+    windows = _plan_windows(speech, _WINDOW_SECONDS * SAMPLE_RATE, _OVERLAP_SECONDS * SAMPLE_RATE)
+    if len(windows) < 2:
+        return transcribe_audio_file(audio, model_name, device, compute_type)
+    
+    key = _model_key(model_name, device, compute_type)
+    pool = _get_parallel_pool()
+    try:
+        # Each window is sent only its speech, clipped to the window bounds
+        window_speech = []
+        for start, end in windows:
+            chunks = [(max(c["start"], start), min(c["end"], end)) for c in speech
+                      if c["start"] < end and c["end"] > start]
+            window_speech.append((chunks, np.concatenate([audio[s:e] for s, e in chunks])))
+        
+        # Detect the language once, as the sequential path does, so a window
+        # opening on music or a foreign phrase is not decoded in another language
+        language, language_probability, _ = get_model(*key).detect_language(window_speech[0][1])
+        
+        tasks = [(key, language, chunks, window_audio) for chunks, window_audio in window_speech]
+        results = list(pool.map(_decode_window, tasks))
+    except BrokenProcessPool as e:
+        _reset_parallel_pool(pool)
+        raise Exception(f"Transcription failed: {e}")
+    except Exception as e:
+        raise Exception(f"Transcription failed: {e}")
+    
+    segments = _stitch_windows(windows, [window_segments for window_segments, _ in results])
+    info = replace(results[0][1], language=language, language_probability=language_probability,
+                   duration=len(audio) / SAMPLE_RATE)
+    return segments, info
+
+
 def transcribe_youtube_video(url: str, output_dir: Path, model_name: str = "base",
                            include_timestamps: bool = False, 
                            cleanup_audio: bool = True,
-                           progress_callback: Optional[Callable[[str], None]] = None) -> TranscriptionResult:
+                           progress_callback: Optional[Callable[[str], None]] = None,
+                           compute_type: Optional[str] = None) -> TranscriptionResult:
     """
     Complete pipeline: Download YouTube video audio and transcribe it
     
     Args:
         url: YouTube URL
-        output_dir: Directory to save transcript and temporary files
+        output_dir: Directory where the transcript will be saved
         model_name: Whisper model to use (tiny, base, small, medium, large)
         include_timestamps: Whether to include timestamps in output
-        cleanup_audio: Whether to delete temporary audio file after transcription
+        cleanup_audio: Unused; audio is decoded in memory and never written to disk
         progress_callback: Optional callback function for progress updates
+        compute_type: Computation type; None picks the best type for the device
         
     Returns:
         TranscriptionResult object containing segments, info, and metadata
@@ -153,53 +595,36 @@ def transcribe_youtube_video(url: str, output_dir: Path, model_name: str = "base
         if progress_callback:
             progress_callback(message)
     
-    try:
-        log(f"Starting transcription for: {url}")
-        log(f"Using faster-whisper model: {model_name}")
-        log(f"Output directory: {output_dir}")
-        log("-" * 50)
-        
-        # Download audio
-        log("Downloading audio from YouTube...")
-        audio_file, video_info = download_youtube_audio(url, output_dir)
-        
-        video_title = video_info.get('title', 'Unknown Video')
-        duration = video_info.get('duration', 0)
-        
-        log(f"Downloaded: {video_title}")
-        if duration:
-            log(f"Duration: {duration//60}:{duration%60:02d}")
-        
-        # Transcribe
-        log("Transcribing audio...")
-        segments, info = transcribe_audio_file(audio_file, model_name)
-        
-        log(f"Detected language: {info.language} (probability: {info.language_probability:.2f})")
-        
-        # Create result object
-        result = TranscriptionResult(segments, info, video_title, url, model_name)
-        
-        # Clean up audio file if requested
-        if cleanup_audio:
-            try:
-                audio_file.unlink()
-                log("Temporary audio file cleaned up")
-            except Exception:
-                log("Warning: Failed to clean up temporary audio file")
-        
-        log("✓ Transcription completed successfully!")
-        return result
-        
-    except Exception as e:
-        # Attempt cleanup on error
-        if cleanup_audio:
-            temp_audio = output_dir / "temp_audio.mp3"
-            if temp_audio.exists():
-                try:
-                    temp_audio.unlink()
-                except Exception:
-                    pass
-        raise e
+    log(f"Starting transcription for: {url}")
+    log(f"Using faster-whisper model: {model_name}")
+    log(f"Output directory: {output_dir}")
+    log("-" * 50)
+    
+    # Download audio
+    log("Downloading audio from YouTube...")
+    audio, video_info = download_youtube_audio(url)
+    
+    video_title = video_info.get('title', 'Unknown Video')
+    duration = video_info.get('duration', 0)
+    
+    log(f"Downloaded: {video_title}")
+    if duration:
+        log(f"Duration: {duration//60}:{duration%60:02d}")
+    
+    # Transcribe
+    log("Transcribing audio...")
+    if len(audio) / SAMPLE_RATE > PARALLEL_MIN_DURATION:
+        segments, info = transcribe_audio_parallel(audio, model_name, compute_type=compute_type)
+    else:
+        segments, info = transcribe_audio_file(audio, model_name, compute_type=compute_type)
+    
+    log(f"Detected language: {info.language} (probability: {info.language_probability:.2f})")
+    
+    # Create result object
+    result = TranscriptionResult(segments, info, video_title, url, model_name)
+    
+    log("✓ Transcription completed successfully!")
+    return result
 
 
 def save_transcript_to_file(result: TranscriptionResult, output_file: Path, 
@@ -227,9 +652,9 @@ def save_transcript_to_file(result: TranscriptionResult, output_file: Path,
             if include_timestamps:
                 f.write("TRANSCRIPT WITH TIMESTAMPS:\n\n")
                 for segment in result.segments:
-                    start_time = format_timestamp(segment.start)
-                    end_time = format_timestamp(segment.end)
-                    f.write(f"[{start_time} - {end_time}] {segment.text.strip()}\n")
+                    f.write(_TIMESTAMPED_LINE % (format_timestamp(segment.start),
+                                                 format_timestamp(segment.end),
+                                                 segment.text.strip()))
             else:
                 f.write("TRANSCRIPT:\n\n")
                 for segment in result.segments:
@@ -250,7 +675,7 @@ def create_safe_filename(title: str, max_length: int = 50) -> str:
     Returns:
         Safe filename string
     """
-    safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
+    safe_title = _UNSAFE_FILENAME_CHARS.sub("", title).strip()
     if not safe_title or len(safe_title) < 3:
         safe_title = "transcript"
     
@@ -0,0 +1,126 @@
+import io
+from dataclasses import dataclass
+
+import pytest
+
+import stt_utils
+from stt_utils import SAMPLE_RATE, _plan_windows, _stitch_windows, _word_overlap
+
+
+@dataclass
+class Segment:
+    start: float
+    end: float
+    text: str
+
+
+def speech(*spans):
+    """Build VAD chunks from (start, end) pairs given in seconds"""
+    return [{"start": start * SAMPLE_RATE, "end": end * SAMPLE_RATE} for start, end in spans]
+
+
+def seconds(windows):
+    return [(start / SAMPLE_RATE, end / SAMPLE_RATE) for start, end in windows]
+
+
+def test_plan_windows_merges_chunks_that_fit():
+    windows = _plan_windows(speech((0, 100), (120, 250), (260, 300)), 300 * SAMPLE_RATE, 2 * SAMPLE_RATE)
+    assert seconds(windows) == [(0, 300)]
+
+
+def test_plan_windows_starts_new_window_at_speech_boundary():
+    windows = _plan_windows(speech((0, 200), (250, 400)), 300 * SAMPLE_RATE, 2 * SAMPLE_RATE)
+    assert seconds(windows) == [(0, 200), (250, 400)]
+
+
+def test_plan_windows_cuts_long_speech_with_overlap():
+    windows = _plan_windows(speech((0, 700)), 300 * SAMPLE_RATE, 2 * SAMPLE_RATE)
+    assert seconds(windows) == [(0, 300), (298, 598), (596, 700)]
+    assert all(end - start <= 300 * SAMPLE_RATE for start, end in windows)
+
+
+def test_plan_windows_extends_cut_window_with_following_chunk():
+    windows = _plan_windows(speech((0, 400), (420, 500)), 300 * SAMPLE_RATE, 2 * SAMPLE_RATE)
+    assert seconds(windows) == [(0, 300), (298, 500)]
+
+
+def test_plan_windows_no_speech():
+    assert _plan_windows([], 300 * SAMPLE_RATE, 2 * SAMPLE_RATE) == []
+
+
+def test_word_overlap():
+    assert _word_overlap("Hello world", "hello WORLD") == 1.0
+    assert _word_overlap("a b", "c d") == 0.0
+    assert _word_overlap("a b c", "b c d") == 0.5
+    assert _word_overlap("", "anything") == 0.0
+
+
+def test_stitch_windows_concatenates_disjoint_windows():
+    windows = [(0, 100 * SAMPLE_RATE), (200 * SAMPLE_RATE, 300 * SAMPLE_RATE)]
+    first = [Segment(0, 10, "one"), Segment(90, 100, "two")]
+    second = [Segment(200, 210, "two")]
+    assert _stitch_windows(windows, [first, second]) == first + second
+
+
+def test_stitch_windows_drops_repeat_in_overlap():
+    windows = [(0, 300 * SAMPLE_RATE), (298 * SAMPLE_RATE, 500 * SAMPLE_RATE)]
+    first = [Segment(290, 300, "the quick brown fox")]
+    second = [Segment(298, 301, "quick brown fox"), Segment(301, 310, "jumps over")]
+    assert [s.text for s in _stitch_windows(windows, [first, second])] == [
+        "the quick brown fox", "jumps over"]
+
+
+def test_stitch_windows_keeps_new_text_in_overlap():
+    windows = [(0, 300 * SAMPLE_RATE), (298 * SAMPLE_RATE, 500 * SAMPLE_RATE)]
+    first = [Segment(290, 300, "the quick brown fox")]
+    second = [Segment(299, 305, "jumps over the lazy dog")]
+    assert len(_stitch_windows(windows, [first, second])) == 2
+
+
+@pytest.fixture
+def cpu(monkeypatch):
+    """Fake the machine type and /proc/cpuinfo flags seen by _best_compute_type"""
+    def fake(machine="x86_64", flags=None):
+        monkeypatch.setattr(stt_utils.platform, "machine", lambda: machine)
+        def fake_open(path, *args, **kwargs):
+            if flags is None:
+                raise OSError(path)
+            return io.StringIO("processor\t: 0\nflags\t\t: %s\n" % " ".join(flags))
+        monkeypatch.setattr(stt_utils, "open", fake_open, raising=False)
+        stt_utils._best_compute_type.cache_clear()
+    yield fake
+    stt_utils._best_compute_type.cache_clear()
+
+
+def test_best_compute_type_cuda(cpu):
+    cpu(flags=[])
+    assert stt_utils._best_compute_type("cuda") == "float16"
+
+
+@pytest.mark.parametrize("flags, expected", [
+    (["sse4_2", "avx2", "avx512f", "avx512_vnni"], "int8"),
+    (["sse4_2", "avx2"], "int8_float32"),
+    (["sse4_2"], "float32"),
+])
+def test_best_compute_type_x86_flags(cpu, flags, expected):
+    cpu(flags=flags)
+    assert stt_utils._best_compute_type("cpu") == expected
+
+
+def test_best_compute_type_unknown_flags_keeps_int8(cpu):
+    cpu(flags=None)
+    assert stt_utils._best_compute_type("cpu") == "int8"
+
+
+def test_best_compute_type_non_x86_keeps_int8(cpu):
+    cpu(machine="aarch64", flags=["fp", "asimd"])
+    assert stt_utils._best_compute_type("cpu") == "int8"
+
+
+def test_restore_time_maps_concatenated_speech_back():
+    chunks = [(10 * SAMPLE_RATE, 20 * SAMPLE_RATE), (50 * SAMPLE_RATE, 60 * SAMPLE_RATE)]
+    offsets = [0, 10 * SAMPLE_RATE, 20 * SAMPLE_RATE]
+    assert stt_utils._restore_time(0, chunks, offsets) == 10
+    assert stt_utils._restore_time(5, chunks, offsets) == 15
+    assert stt_utils._restore_time(12, chunks, offsets) == 52
+    assert stt_utils._restore_time(20, chunks, offsets) == 60
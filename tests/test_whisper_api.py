@@ -0,0 +1,61 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="module")
+def api(tmp_path_factory):
+    # youtube_jobs creates its status DB and transcript dir in the working
+    # directory on import, so import the app from a scratch directory
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("api"))
+    try:
+        import whisper_api
+    finally:
+        os.chdir(cwd)
+    return whisper_api
+
+
+@pytest.fixture
+def client(api):
+    # Not used as a context manager, so the startup warmup never runs
+    return TestClient(api.app)
+
+
+def test_api_key_unset_is_open(api, client, monkeypatch):
+    monkeypatch.setattr(api, "_API_KEY", "")
+    assert client.get("/models").status_code == 200
+
+
+def test_api_key_correct(api, client, monkeypatch):
+    monkeypatch.setattr(api, "_API_KEY", "secret")
+    assert client.get("/models", headers={"X-API-Key": "secret"}).status_code == 200
+
+
+def test_api_key_wrong(api, client, monkeypatch):
+    monkeypatch.setattr(api, "_API_KEY", "secret")
+    assert client.get("/models", headers={"X-API-Key": "wrong"}).status_code == 403
+
+
+def test_api_key_missing(api, client, monkeypatch):
+    monkeypatch.setattr(api, "_API_KEY", "secret")
+    assert client.get("/models").status_code == 403
+
+
+def test_unsupported_extension_rejected(api, client, monkeypatch):
+    monkeypatch.setattr(api, "_API_KEY", "")
+    response = client.post("/transcribe-audio", files={"file": ("notes.txt", b"hello")})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Unsupported format"}
+
+
+@pytest.mark.parametrize("filename, ext", [("a.MP3", ".mp3"), ("a.mov", ".mov"), ("recording", ".webm")])
+def test_supported_extension_reaches_decoder(api, client, monkeypatch, filename, ext):
+    def undecodable(fileobj):
+        raise Exception("not audio")
+    monkeypatch.setattr(api, "_API_KEY", "")
+    monkeypatch.setitem(api._EXT_TO_DECODER, ext, undecodable)
+    response = client.post("/transcribe-audio", files={"file": (filename, b"hello")})
+    assert response.status_code == 400
+    assert response.json() == {"error": "Could not decode audio: not audio"}
@@ -1,11 +1,80 @@
-from fastapi import FastAPI, UploadFile, File, Request
+from fastapi import FastAPI, UploadFile, File, Request, HTTPException, Header, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware  # Add CORS support
+from fastapi.responses import StreamingResponse, ORJSONResponse, Response
+from fastapi.concurrency import run_in_threadpool, iterate_in_threadpool
 from youtube_jobs import *
-from stt_utils import transcribe_audio_file  # Import the transcription function
-from pathlib import Path
-import uuid, shutil, os
+from stt_utils import transcribe_audio_file, decode_audio_stream, decode_audio_file, SAMPLE_RATE, NUM_WORKERS  # Import the transcription functions
+from typing import Optional
+import uuid, os, asyncio, hmac, logging, queue, shutil, tempfile
+import numpy as np
+import orjson
+import soundfile as sf
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+MAX_FILE_SIZE = 100 * 1024 * 1024  # 100 MB upload limit
+
+# Models selectable via ?model=, smallest/fastest first. The /models payload
+# never changes, so it is serialized once here.
+_MODEL_NAMES = ("tiny", "base", "small", "medium", "large")
+_VALID_MODELS = frozenset(_MODEL_NAMES)
+_DEFAULT_MODEL = os.getenv("WHISPER_DEFAULT_MODEL", "base")
+if _DEFAULT_MODEL not in _VALID_MODELS:
+    raise RuntimeError(f"WHISPER_DEFAULT_MODEL must be one of: {', '.join(_MODEL_NAMES)} (got {_DEFAULT_MODEL!r})")
+_MODELS_JSON = orjson.dumps({"models": _MODEL_NAMES})
+
+# Transcriptions allowed to run at once against the shared model. The model
+# only decodes NUM_WORKERS streams in parallel, so admitting more just adds
+# contention; extra requests are turned away with 429 instead of queueing.
+_TRANSCRIBE_SEM = asyncio.Semaphore(int(os.getenv("WHISPER_CONCURRENCY", str(NUM_WORKERS))))
+
+# Optional shared secret; read once at startup. When unset the API is open.
+_API_KEY = os.environ.get("WHISPER_API_KEY", "")
+
+def verify_api_key(x_api_key: Optional[str] = Header(None)):
+    """Require a matching X-API-Key header when WHISPER_API_KEY is set"""
+    # compare_digest takes the same time wherever the first mismatch is
+    if _API_KEY and not hmac.compare_digest((x_api_key or "").encode(), _API_KEY.encode()):
+        raise HTTPException(status_code=403, detail="Invalid or missing API key")
+
+app = FastAPI(dependencies=[Depends(verify_api_key)], default_response_class=ORJSONResponse)
+
+class LimitUploadSize:
+    """
+    Pure ASGI middleware capping the /transcribe-audio request body
+    
+    A declared Content-Length over the limit is rejected before the body is
+    read; chunked uploads are cut off with 413 once the bytes actually
+    received pass it. Other routes are passed through untouched.
+    """
+    def __init__(self, app, max_size: int):
+        self.app = app
+        self.max_size = max_size
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != "/transcribe-audio":
+            return await self.app(scope, receive, send)
+        
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_size:
+                response = ORJSONResponse(status_code=413, content={"detail": "File too large"})
+                return await response(scope, receive, send)
+        
+        received = 0
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    # FastAPI re-raises HTTPExceptions from body parsing as-is
+                    raise HTTPException(status_code=413, detail="File too large")
+            return message
+        
+        await self.app(scope, limited_receive, send)
+
+# Registered before CORS so CORS wraps it and 413s still carry CORS headers
+app.add_middleware(LimitUploadSize, max_size=MAX_FILE_SIZE)
 
 # Add CORS so your web app can access the API
 app.add_middleware(
@@ -16,60 +85,180 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _soundfile_decode(fileobj):
+    """Decode 16 kHz audio with libsndfile in-process, anything else with ffmpeg"""
+    try:
+        # Only the header is parsed here; samples are read if no resampling is needed
+        with sf.SoundFile(fileobj) as audio_file:
+            if audio_file.samplerate == SAMPLE_RATE:
+                return audio_file.read(dtype="float32", always_2d=True).mean(axis=1)
+    except RuntimeError:
+        pass  # e.g. an Opus-in-Ogg file older libsndfile can't read
+    # Other sample rates or unreadable: a single ffmpeg pass resamples/decodes
+    fileobj.seek(0)
+    return decode_audio_stream(fileobj)
+
+def _seekable_decode(fileobj):
+    """Decode containers ffmpeg must seek in (MP4/M4A/MOV with a trailing index) from a path"""
+    # A spooled upload rolled over to a named file can be read in place
+    name = getattr(fileobj, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        return decode_audio_file(name)
+    with tempfile.NamedTemporaryFile() as temp_file:
+        shutil.copyfileobj(fileobj, temp_file, 1024 * 1024)
+        temp_file.flush()
+        return decode_audio_file(temp_file.name)
+
+# Supported upload extensions mapped to the decoder that turns them into
+# 16 kHz mono float32 samples; anything not listed is rejected
+_EXT_TO_DECODER = {
+    ".wav": _soundfile_decode,
+    ".flac": _soundfile_decode,
+    ".ogg": _soundfile_decode,
+    ".mp3": decode_audio_stream,
+    ".m4a": _seekable_decode,
+    ".mp4": _seekable_decode,
+    ".mov": _seekable_decode,
+    ".aac": decode_audio_stream,
+    ".webm": decode_audio_stream,
+    ".opus": decode_audio_stream,
+    ".mpeg": decode_audio_stream,
+    ".mpga": decode_audio_stream,
+}
+
+def _warmup_model():
+    """Run the default model through the same paths /transcribe-audio uses"""
+    silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    # Default batched + VAD path: loads the model, pipeline and Silero VAD
+    segments, _ = transcribe_audio_file(silence, model_name=_DEFAULT_MODEL, device="cpu")
+    list(segments)
+    # VAD finds no speech in silence, so also push it through the sequential
+    # path once to run the encoder and decoder
+    segments, _ = transcribe_audio_file(silence, model_name=_DEFAULT_MODEL, device="cpu",
+                                        vad_filter=False)
+    list(segments)  # segments are lazy; consume them so the decoder runs too
+
+# Pay for model loading and CTranslate2's first-run setup at deploy time
+# rather than on the first user request. A failed warmup is only logged: the
+# model is loaded again on demand, as it would be without warmup.
+@app.on_event("startup")
+async def warmup():
+    try:
+        await run_in_threadpool(_warmup_model)
+    except Exception:
+        logger.exception("Model warmup failed; the model will be loaded on first request")
+
 # NEW ENDPOINT: Upload and transcribe audio file
 @app.post("/transcribe-audio")
-async def transcribe_audio(file: UploadFile = File(...)):
+async def transcribe_audio(file: UploadFile = File(...), model: str = _DEFAULT_MODEL,
+                           beam_size: int = Query(1, ge=1, le=10), vad_filter: bool = True):
     """
     Upload an audio file and get back the transcription.
-    Accepts: mp3, wav, webm, m4a, ogg, etc.
+    Accepts: wav, flac, ogg, mp3, m4a, mp4, mov, aac, webm, opus, mpeg, mpga.
+    
+    model picks the Whisper model: "tiny" is faster, "small"/"medium" give
+    better quality (see /models).
+    
+    Decoding is greedy (beam_size=1) and skips silence (vad_filter=true) by
+    default; pass beam_size=5 for slightly better accuracy at a higher cost
+    (at most 10).
+    
+    The response is streamed as NDJSON: one {"text", "start", "end"} record
+    per segment as it is decoded, followed by a final record carrying
+    "language" and "language_probability". If transcription fails after
+    streaming has started, the final record is {"error": "..."} instead.
     """
+    if model not in _VALID_MODELS:
+        raise HTTPException(status_code=400, detail=f"Invalid model. Choose from: {', '.join(_MODEL_NAMES)}")
+    
+    # Extensionless uploads (e.g. browser MediaRecorder blobs) are webm
+    filename = file.filename or ""
+    i = filename.rfind(".")
+    decoder = _EXT_TO_DECODER.get(filename[i:].lower() if i >= 0 else ".webm")
+    if decoder is None:
+        raise HTTPException(status_code=400, detail="Unsupported format")
+    
+    if _TRANSCRIBE_SEM.locked():
+        raise HTTPException(status_code=429, detail="Server busy, try again shortly",
+                            headers={"Retry-After": "5"})
+    await _TRANSCRIBE_SEM.acquire()
+    
+    # The slot is released here on every early exit; once the response is
+    # built, _stream takes over releasing it
+    streaming = False
     try:
-        # Create temp directory if it doesn't exist
-        temp_dir = Path("temp_uploads")
-        temp_dir.mkdir(exist_ok=True)
-        
-        # Save uploaded file temporarily
-        file_id = str(uuid.uuid4())
-        file_ext = Path(file.filename).suffix or ".webm"
-        temp_file = temp_dir / f"{file_id}{file_ext}"
-        
-        # Write uploaded file to disk
-        with open(temp_file, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Decode the upload straight from its spooled buffer, off the event loop
+        try:
+            audio = await run_in_threadpool(decoder, file.file)
+        except Exception as e:
+            return ORJSONResponse(status_code=400, content={"error": f"Could not decode audio: {e}"})
         
-        # Transcribe using faster-whisper
-        segments, info = transcribe_audio_file(
-            temp_file,
-            model_name="base",  # Use "tiny" for faster, "small"/"medium" for better quality
-            device="cpu",
-            compute_type="int8"
-        )
+        # Transcribe using faster-whisper. Model loading, VAD and language
+        # detection run eagerly here, so keep them off the event loop too.
+        try:
+            segments, info = await run_in_threadpool(
+                transcribe_audio_file,
+                audio,
+                model_name=model,
+                device="cpu",
+                compute_type=None,  # Resolved per device by stt_utils
+                beam_size=beam_size,
+                vad_filter=vad_filter
+            )
+        except Exception as e:
+            logger.exception("Transcription failed")
+            return ORJSONResponse(status_code=500, content={"error": str(e)})
         
-        # Collect all text from segments
-        transcript = " ".join([segment.text.strip() for segment in segments])
+        # Segments are decoded lazily; emit each one as soon as it is ready.
+        # The plain generator is iterated in the threadpool, so decoding never
+        # blocks the event loop, and the slot is held until the stream ends.
+        # The 200 status is already sent once streaming starts, so a failure
+        # mid-transcription is reported as a final error record instead.
+        def _gen():
+            try:
+                for segment in segments:
+                    yield orjson.dumps({
+                        "text": segment.text.strip(),
+                        "start": segment.start,
+                        "end": segment.end
+                    }, option=orjson.OPT_APPEND_NEWLINE)
+            except Exception as e:
+                logger.exception("Transcription failed mid-stream")
+                yield orjson.dumps({"error": f"Transcription failed: {e}"},
+                                   option=orjson.OPT_APPEND_NEWLINE)
+                return
+            yield orjson.dumps({
+                "language": info.language,
+                "language_probability": info.language_probability
+            }, option=orjson.OPT_APPEND_NEWLINE)
         
-        # Clean up temp file
-        temp_file.unlink()
+        async def _stream():
+            try:
+                async for line in iterate_in_threadpool(_gen()):
+                    yield line
+            finally:
+                _TRANSCRIBE_SEM.release()
         
-        return {
-            "transcript": transcript,
-            "language": info.language,
-            "language_probability": info.language_probability
-        }
-        
-    except Exception as e:
-        # Clean up on error
-        if temp_file and temp_file.exists():
-            temp_file.unlink()
-        return {"error": str(e)}, 500
+        response = StreamingResponse(_stream(), media_type="application/x-ndjson")
+        streaming = True
+        return response
+    finally:
+        if not streaming:
+            _TRANSCRIBE_SEM.release()
+
+@app.get("/models")
+def list_models():
+    return Response(content=_MODELS_JSON, media_type="application/json")
 
 @app.post("/transcribe-youtube")
 async def transcribe_youtube(request: Request):
     data = await request.json()
     url = data.get("url")
     job_id = str(uuid.uuid4())
-    update_job_status(job_id, "queued")
-    threading.Thread(target=transcribe_youtube_video, args=(job_id, url)).start()
+    try:
+        submit_job(job_id, url)
+    except queue.Full:
+        raise HTTPException(status_code=503, detail="Too many queued jobs, try again later")
     return {"job_id": job_id, "status": "queued"}
 
 @app.get("/status/{job_id}")
@@ -1,51 +1,82 @@
-import os, uuid, json, threading
-from faster_whisper import WhisperModel
-import yt_dlp
+import os, uuid, queue, sqlite3, threading
+from stt_utils import (download_youtube_audio, transcribe_audio_file, transcribe_audio_parallel,
+                       SAMPLE_RATE, PARALLEL_MIN_DURATION)
 
 TRANSCRIPT_DIR = "transcriptions"
-STATUS_FILE = "job_status.json"
+STATUS_DB = "job_status.db"
 os.makedirs(TRANSCRIPT_DIR, exist_ok=True)
 lock = threading.Lock()
 
-def load_status():
-    if os.path.exists(STATUS_FILE):
-        with open(STATUS_FILE, "r") as f:
-            return json.load(f)
-    return {}
+# Jobs run on a fixed number of worker threads sharing the cached model;
+# CTranslate2 already spreads each transcription over several cores.
+JOB_QUEUE_SIZE = 32
+JOB_WORKERS = max(1, min((os.cpu_count() or 1) // 4, 2))
+_JOB_QUEUE = queue.Queue(maxsize=JOB_QUEUE_SIZE)
 
-def save_status(status):
-    with open(STATUS_FILE, "w") as f:
-        json.dump(status, f)
+# The in-memory dict is the source of truth; SQLite only persists each
+# transition so statuses survive a restart.
+_db = sqlite3.connect(STATUS_DB, check_same_thread=False)
+_db.execute("PRAGMA journal_mode=WAL")
+_db.execute("CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY, state TEXT NOT NULL)")
+_db.commit()
+_STATUS = dict(_db.execute("SELECT job_id, state FROM jobs"))
 
 def update_job_status(job_id, state):
     with lock:
-        status = load_status()
-        status[job_id] = state
-        save_status(status)
+        _STATUS[job_id] = state
+        _db.execute("INSERT OR REPLACE INTO jobs VALUES (?, ?)", (job_id, state))
+        _db.commit()
+
+def delete_job_status(job_id):
+    with lock:
+        _STATUS.pop(job_id, None)
+        _db.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+        _db.commit()
 
 def get_job_status(job_id):
-    return load_status().get(job_id, "not_found")
+    return _STATUS.get(job_id, "not_found")
 
-def transcribe_youtube_video(job_id, url):
+def transcribe_youtube_video(job_id, url, compute_type=None):
     try:
         update_job_status(job_id, "processing")
-        ydl_opts = {
-            "format": "bestaudio/best",
-            "outtmpl": f"{TRANSCRIPT_DIR}/{job_id}.%(ext)s",
-            "quiet": True
-        }
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            file_path = ydl.prepare_filename(info)
-
-        model = WhisperModel("base", compute_type="int8")
-        segments, _ = model.transcribe(file_path)
-        transcript = " ".join([seg.text.strip() for seg in segments])
+        audio, _ = download_youtube_audio(url)
 
+        if len(audio) / SAMPLE_RATE > PARALLEL_MIN_DURATION:
+            segments, _ = transcribe_audio_parallel(audio, "base", compute_type=compute_type)
+        else:
+            segments, _ = transcribe_audio_file(audio, "base", compute_type=compute_type)
+
+        # Write each segment as it is decoded rather than joining them first
         with open(f"{TRANSCRIPT_DIR}/{job_id}.txt", "w") as f:
-            f.write(transcript)
+            separator = ""
+            for seg in segments:
+                f.write(separator)
+                f.write(seg.text.strip())
+                separator = " "
 
         update_job_status(job_id, "done")
 
     except Exception as e:
         update_job_status(job_id, f"error: {str(e)}")
+
+def _worker():
+    while True:
+        job_id, url = _JOB_QUEUE.get()
+        try:
+            transcribe_youtube_video(job_id, url)
+        finally:
+            _JOB_QUEUE.task_done()
+
+def submit_job(job_id, url):
+    """Queue a job; raises queue.Full when JOB_QUEUE_SIZE jobs are already waiting."""
+    # Marked queued before it is enqueued so a worker's "processing" can't be
+    # overwritten; a rejected job's id never reaches the client, so drop it.
+    update_job_status(job_id, "queued")
+    try:
+        _JOB_QUEUE.put_nowait((job_id, url))
+    except queue.Full:
+        delete_job_status(job_id)
+        raise
+
+for _ in range(JOB_WORKERS):
+    threading.Thread(target=_worker, daemon=True).start()